@@ -4,39 +4,129 @@ For API info see:
     https://api.jellyfin.org/
 """
 from typing import List
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import requests
 import json
 import logging
+import threading
+import time
+
+from .exceptions import HTTPException
+from .http import create_session
+
+try:
+    import orjson
+
+    def _json_dumps(obj):
+        return orjson.dumps(obj)
+except ImportError:
+    def _json_dumps(obj):
+        return json.dumps(obj).encode()
 
 LOG = logging.getLogger('JELLYFIN.' + __name__)
 
 
 def jellyfin_url(client, handler):
-    return "%s/%s" % (client.config.data['auth.server'], handler)
+    return f"{client.config.data['auth.server']}/{handler}"
+
+
+# Field strings are constant, so build them once at import time instead of
+# rebuilding them on every request.
+_BASIC_INFO_FIELDS = "Etag"
+
+_INFO_FIELDS = (
+    "Path,Genres,SortName,Studios,Writer,Taglines,LocalTrailerCount,"
+    "OfficialRating,CumulativeRunTimeTicks,ItemCounts,"
+    "Metascore,AirTime,DateCreated,People,Overview,"
+    "CriticRating,CriticRatingSummary,Etag,ShortOverview,ProductionLocations,"
+    "Tags,ProviderIds,ParentId,RemoteTrailers,SpecialEpisodeNumbers,"
+    "MediaSources,VoteCount,RecursiveItemCount,PrimaryImageAspectRatio"
+)
+
+_MUSIC_INFO_FIELDS = (
+    "Etag,Genres,SortName,Studios,Writer,"
+    "OfficialRating,CumulativeRunTimeTicks,Metascore,"
+    "AirTime,DateCreated,MediaStreams,People,ProviderIds,Overview,ItemCounts"
+)
+
+# Fully static param dicts, built once. _clean_params copies params at
+# dispatch, so the constants are never mutated downstream.
+_CHANNELS_PARAMS = {
+    'UserId': "{UserId}",
+    'EnableImages': True,
+    'EnableUserData': True
+}
+
+_SESSIONS_PARAMS = {'ControllableByUserId': "{UserId}"}
+
+# Time-critical endpoints where waiting out the full http.timeout (30 s by
+# default) is worse than failing and re-reporting on the next tick. Values
+# stay generous enough for slow links; everything else keeps the default.
+_ENDPOINT_TIMEOUTS = {
+    "SyncPlay/Ping": 2,
+    "SyncPlay/Buffering": 3,
+    "SyncPlay/Ready": 3,
+    "SyncPlay/Seek": 3,
+}
+
+# Endpoints whose responses are a few bytes at most; asking the server to
+# gzip those wastes CPU on both ends.
+_NO_COMPRESS_PREFIXES = ("SyncPlay/", "Sessions/Playing")
 
 
 def basic_info():
-    return "Etag"
+    return _BASIC_INFO_FIELDS
 
 
 def info():
-    return (
-        "Path,Genres,SortName,Studios,Writer,Taglines,LocalTrailerCount,"
-        "OfficialRating,CumulativeRunTimeTicks,ItemCounts,"
-        "Metascore,AirTime,DateCreated,People,Overview,"
-        "CriticRating,CriticRatingSummary,Etag,ShortOverview,ProductionLocations,"
-        "Tags,ProviderIds,ParentId,RemoteTrailers,SpecialEpisodeNumbers,"
-        "MediaSources,VoteCount,RecursiveItemCount,PrimaryImageAspectRatio"
-    )
+    return _INFO_FIELDS
 
 
 def music_info():
-    return (
-        "Etag,Genres,SortName,Studios,Writer,"
-        "OfficialRating,CumulativeRunTimeTicks,Metascore,"
-        "AirTime,DateCreated,MediaStreams,People,ProviderIds,Overview,ItemCounts"
-    )
+    return _MUSIC_INFO_FIELDS
+
+
+def _format_utc(dt):
+    # Single-allocation replacement for dt.isoformat() + "Z" on the
+    # SyncPlay reporting path. Microseconds are always included, which
+    # Jellyfin accepts either way.
+    return (f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d}"
+            f"T{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}.{dt.microsecond:06d}Z")
+
+
+def _clean_params(params):
+    # Most endpoint helpers build params dicts with optional keys left as
+    # None. Drop them here in one pass instead of letting every later layer
+    # (placeholder substitution, URL encoding) iterate over dead keys.
+    if params:
+        return {k: v for k, v in params.items() if v is not None}
+    return params
+
+
+class _RateLimiter:
+    """
+    Thread-safe token bucket. acquire() blocks until a token is available,
+    refilling at ``rate`` tokens per second with a burst capacity of
+    ``rate``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens = None
+        self._last = None
+
+    def acquire(self, rate):
+        with self._lock:
+            now = time.monotonic()
+            if self._last is None:
+                self._tokens = float(rate)
+            else:
+                self._tokens = min(float(rate), self._tokens + (now - self._last) * rate)
+            self._last = now
+            self._tokens -= 1
+            wait = -self._tokens / rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
 
 
 class InternalAPIMixin:
@@ -45,35 +135,48 @@ class InternalAPIMixin:
     classes will use.
     """
 
-    def _http(self, action, url, request={}):
+    def _http(self, action, url, request=None):
+        request = {} if request is None else request
         request.update({'type': action, 'handler': url})
 
         return self.client.request(request)
 
-    def _http_url(self, action, url, request={}):
+    def _http_url(self, action, url, request=None):
+        request = {} if request is None else request
         request.update({"type": action, "handler": url})
 
         return self.client.request_url(request)
 
-    def _http_stream(self, action, url, dest_file, request={}):
+    def _http_stream(self, action, url, dest_file, request=None):
+        request = {} if request is None else request
         request.update({'type': action, 'handler': url})
 
         self.client.request(request, dest_file=dest_file)
 
     def _get(self, handler, params=None):
-        return self._http("GET", handler, {'params': params})
+        return self.client.request({'type': "GET", 'handler': handler, 'params': _clean_params(params)})
+
+    def _head(self, handler, params=None):
+        return self.client.request({'type': "HEAD", 'handler': handler, 'params': _clean_params(params)})
 
     def _get_url(self, handler, params=None):
-        return self._http_url("GET", handler, {"params": params})
+        return self.client.request_url({'type': "GET", 'handler': handler, 'params': _clean_params(params)})
 
     def _post(self, handler, json=None, params=None):
-        return self._http("POST", handler, {'params': params, 'json': json})
+        return self.client.request({
+            'type': "POST",
+            'handler': handler,
+            'params': _clean_params(params),
+            'json': json,
+            'timeout': _ENDPOINT_TIMEOUTS.get(handler),
+            'compress': not handler.startswith(_NO_COMPRESS_PREFIXES)
+        })
 
     def _delete(self, handler, params=None):
-        return self._http("DELETE", handler, {'params': params})
+        return self.client.request({'type': "DELETE", 'handler': handler, 'params': _clean_params(params)})
 
     def _get_stream(self, handler, dest_file, params=None):
-        self._http_stream("GET", handler, dest_file, {'params': params})
+        self.client.request({'type': "GET", 'handler': handler, 'params': _clean_params(params)}, dest_file=dest_file)
 
 
 class BiggerAPIMixin:
@@ -86,16 +189,16 @@ class BiggerAPIMixin:
 
     def command(self, id, command, params=None, json=None):
         return self._post(
-            "Sessions/%s/Command" % id,
+            f"Sessions/{id}/Command",
             json={"Name": command, "Arguments": json},
             params=params,
         )
 
     def remote(self, id, command, params=None, json=None):
         handler = (
-            "Sessions/%s/Playing/%s" % (id, command)
+            f"Sessions/{id}/Playing/{command}"
             if command
-            else "Sessions/%s/Playing" % id
+            else f"Sessions/{id}/Playing"
         )
         return self._post(
             handler,
@@ -105,19 +208,19 @@ class BiggerAPIMixin:
 
     def sessions(self, handler="", action="GET", params=None, json=None):
         if action == "POST":
-            return self._post("Sessions%s" % handler, json, params)
+            return self._post(f"Sessions{handler}", json, params)
         elif action == "DELETE":
-            return self._delete("Sessions%s" % handler, params)
+            return self._delete(f"Sessions{handler}", params)
         else:
-            return self._get("Sessions%s" % handler, params)
+            return self._get(f"Sessions{handler}", params)
 
     def users(self, handler="", action="GET", params=None, json=None):
         if action == "POST":
-            return self._post("Users/{UserId}%s" % handler, json, params)
+            return self._post(f"Users/{{UserId}}{handler}", json, params)
         elif action == "DELETE":
-            return self._delete("Users/{UserId}%s" % handler, params)
+            return self._delete(f"Users/{{UserId}}{handler}", params)
         else:
-            return self._get("Users/{UserId}%s" % handler, params)
+            return self._get(f"Users/{{UserId}}{handler}", params)
 
     def media_folders(self, params=None):
         return self._get("Library/MediaFolders/", params)
@@ -134,10 +237,14 @@ class BiggerAPIMixin:
         return self._get("Library/PhysicalPaths/", params)
 
     def folder_contents(self, abspath="/", params=None, json=None):
-        params = {} if params is None else params.copy()
-        params['path'] = abspath
-        params['includeFiles'] = params.get('includeFiles', True)
-        params['includeDirectories'] = params.get('includeDirectories', True)
+        # Caller-supplied keys override the include defaults; path always
+        # comes from abspath.
+        params = {
+            'includeFiles': True,
+            'includeDirectories': True,
+            **(params or {}),
+            'path': abspath,
+        }
         return self._get("Environment/DirectoryContents", params)
 
     def refresh_library(self):
@@ -173,25 +280,25 @@ class BiggerAPIMixin:
 
     def items(self, handler="", action="GET", params=None, json=None):
         if action == "POST":
-            return self._post("Items%s" % handler, json, params)
+            return self._post(f"Items{handler}", json, params)
         elif action == "DELETE":
-            return self._delete("Items%s" % handler, params)
+            return self._delete(f"Items{handler}", params)
         else:
-            return self._get("Items%s" % handler, params)
+            return self._get(f"Items{handler}", params)
 
     def user_items(self, handler="", params=None):
-        return self.users("/Items%s" % handler, params=params)
+        return self.users(f"/Items{handler}", params=params)
 
     def shows(self, handler, params):
-        return self._get("Shows%s" % handler, params)
+        return self._get(f"Shows{handler}", params)
 
     def videos(self, handler):
-        return self._get("Videos%s" % handler)
+        return self._get(f"Videos{handler}")
 
     def artwork(self, item_id, art, max_width, ext="jpg", index=None):
         params = {"MaxWidth": max_width, "format": ext}
-        handler = ("Items/%s/Images/%s" % (item_id, art) if index is None
-                   else "items/%s/images/%s/%s" % (item_id, art, index)
+        handler = (f"Items/{item_id}/Images/{art}" if index is None
+                   else f"items/{item_id}/images/{art}/{index}"
                    )
 
         return self._get_url(handler, params)
@@ -209,7 +316,7 @@ class BiggerAPIMixin:
         if audio_codec:
             params["AudioCodec"] = audio_codec
 
-        return self._get_url("Audio/%s/universal" % item_id, params)
+        return self._get_url(f"Audio/{item_id}/universal", params)
 
     def video_url(self, item_id, media_source_id=None):
         params = {
@@ -219,11 +326,11 @@ class BiggerAPIMixin:
         if media_source_id is not None:
             params["MediaSourceId"] = media_source_id
 
-        return self._get_url("Videos/%s/stream" % item_id, params)
+        return self._get_url(f"Videos/{item_id}/stream", params)
 
     def download_url(self, item_id):
         params = {}
-        return self._get_url("Items/%s/Download" % item_id, params)
+        return self._get_url(f"Items/{item_id}/Download", params)
 
 
 class GranularAPIMixin:
@@ -238,7 +345,7 @@ class GranularAPIMixin:
         return self._get("Users/Public")
 
     def get_user(self, user_id=None):
-        return self.users() if user_id is None else self._get("Users/%s" % user_id)
+        return self.users() if user_id is None else self._get(f"Users/{user_id}")
 
     def get_user_settings(self, client="emby"):
         return self._get("DisplayPreferences/usersettings", params={
@@ -274,8 +381,8 @@ class GranularAPIMixin:
         Returns:
             Dict[str, Any]: metadata keys and values for the queried item.
         """
-        return self.users("/Items/%s" % item_id, params={
-            'Fields': info()
+        return self.users(f"/Items/{item_id}", params={
+            'Fields': _INFO_FIELDS
         })
 
     def get_items(self, item_ids):
@@ -289,12 +396,45 @@ class GranularAPIMixin:
             Dict[str, Any]: A result dictionary where the info from each
                 item is stored in the "Items" list.
         """
+        # Item ids are normally a list of strings already; fall back to
+        # stringifying when given any other iterable or element type.
+        if not (isinstance(item_ids, (list, tuple))
+                and all(isinstance(x, str) for x in item_ids)):
+            item_ids = [str(x) for x in item_ids]
         return self.users("/Items", params={
-            'Ids': ','.join(str(x) for x in item_ids),
-            'Fields': info()
+            'Ids': ','.join(item_ids),
+            'Fields': _INFO_FIELDS
         })
 
-    def update_item(self, item_id, data):
+    def get_items_batched(self, item_ids, chunk_size=50):
+        """
+        Lookup metadata for many items, splitting the id list into chunked
+        ``Items?Ids=`` requests issued concurrently. One batched request per
+        chunk replaces a round trip per item, while chunking keeps the URL
+        below proxy length limits.
+
+        Args:
+            item_ids (List[str]): item uuids to lookup metadata for
+
+            chunk_size (int): maximum number of ids per request
+
+        Returns:
+            Dict[str, Any]: a result dictionary with the merged "Items"
+                list from all chunks.
+        """
+        chunks = [item_ids[i:i + chunk_size] for i in range(0, len(item_ids), chunk_size)]
+        if len(chunks) <= 1:
+            return self.get_items(item_ids)
+
+        with ThreadPoolExecutor(max_workers=min(len(chunks), 8)) as executor:
+            responses = list(executor.map(self.get_items, chunks))
+
+        items = []
+        for response in responses:
+            items.extend(response.get('Items', []))
+        return {'Items': items, 'TotalRecordCount': len(items)}
+
+    def update_item(self, item_id, data, base_item=None):
         """
         Updates the metadata for an item.
 
@@ -306,27 +446,32 @@ class GranularAPIMixin:
             data (Dict): the new information to add to this item.
                 Note: any specified items are completely overwritten.
 
+            base_item (Dict | None): the full existing metadata for the item,
+                if the caller already has it (e.g. from a previous
+                :func:`get_item`). When given, the refetch before the update
+                is skipped.
+
         References:
             .. [UpdateItem] https://api.jellyfin.org/#tag/ItemUpdate/operation/UpdateItem
         """
         # Force us to get the entire original item, we need to pass
         # all information, otherwise all info is overwritten
-        body = self.get_item(item_id)
+        body = dict(base_item) if base_item is not None else self.get_item(item_id)
         body.update(data)
         assert body['Id'] == item_id
         return self.items('/' + item_id, action='POST', params=None, json=body)
 
     def get_sessions(self):
-        return self.sessions(params={'ControllableByUserId': "{UserId}"})
+        return self.sessions(params=_SESSIONS_PARAMS)
 
     def get_device(self, device_id):
         return self.sessions(params={'DeviceId': device_id})
 
     def post_session(self, session_id, url, params=None, data=None):
-        return self.sessions("/%s/%s" % (session_id, url), "POST", params, data)
+        return self.sessions(f"/{session_id}/{url}", "POST", params, data)
 
     def get_images(self, item_id):
-        return self.items("/%s/Images" % item_id)
+        return self.items(f"/{item_id}/Images")
 
     def get_suggestion(self, media="Movie,Episode", limit=1):
         return self.users("/Suggestions", params={
@@ -340,7 +485,7 @@ class GranularAPIMixin:
             'UserId': "{UserId}",
             'IncludeItemTypes': media,
             'ParentId': parent_id,
-            'Fields': info()
+            'Fields': _INFO_FIELDS
         })
 
     def get_next(self, index=None, limit=1):
@@ -351,14 +496,14 @@ class GranularAPIMixin:
         })
 
     def get_adjacent_episodes(self, show_id, item_id):
-        return self.shows("/%s/Episodes" % show_id, {
+        return self.shows(f"/{show_id}/Episodes", {
             'UserId': "{UserId}",
             'AdjacentTo': item_id,
             'Fields': "Overview"
         })
 
     def get_season(self, show_id, season_id):
-        return self.shows("/%s/Episodes" % show_id, {
+        return self.shows(f"/{show_id}/Episodes", {
             'UserId': "{UserId}",
             'SeasonId': season_id
         })
@@ -367,14 +512,14 @@ class GranularAPIMixin:
         return self._get("Genres", {
             'ParentId': parent_id,
             'UserId': "{UserId}",
-            'Fields': info()
+            'Fields': _INFO_FIELDS
         })
 
     def get_recommendation(self, parent_id=None, limit=20):
         return self._get("Movies/Recommendations", {
             'ParentId': parent_id,
             'UserId': "{UserId}",
-            'Fields': info(),
+            'Fields': _INFO_FIELDS,
             'Limit': limit
         })
 
@@ -382,7 +527,7 @@ class GranularAPIMixin:
         return self.user_items(params={
             'ParentId': parent_id,
             'NameStartsWith': letter,
-            'Fields': info(),
+            'Fields': _INFO_FIELDS,
             'Recursive': True,
             'IncludeItemTypes': media
         })
@@ -425,29 +570,25 @@ class GranularAPIMixin:
         })
 
     def get_channels(self):
-        return self._get("LiveTv/Channels", {
-            'UserId': "{UserId}",
-            'EnableImages': True,
-            'EnableUserData': True
-        })
+        return self._get("LiveTv/Channels", _CHANNELS_PARAMS)
 
     def get_intros(self, item_id):
-        return self.user_items("/%s/Intros" % item_id)
+        return self.user_items(f"/{item_id}/Intros")
 
     def get_additional_parts(self, item_id):
-        return self.videos("/%s/AdditionalParts" % item_id)
+        return self.videos(f"/{item_id}/AdditionalParts")
 
     def delete_item(self, item_id):
-        return self.items("/%s" % item_id, "DELETE")
+        return self.items(f"/{item_id}", "DELETE")
 
     def get_local_trailers(self, item_id):
-        return self.user_items("/%s/LocalTrailers" % item_id)
+        return self.user_items(f"/{item_id}/LocalTrailers")
 
     def get_transcode_settings(self):
         return self._get('System/Configuration/encoding')
 
     def get_ancestors(self, item_id):
-        return self.items("/%s/Ancestors" % item_id, params={
+        return self.items(f"/{item_id}/Ancestors", params={
             'UserId': "{UserId}"
         })
 
@@ -458,7 +599,7 @@ class GranularAPIMixin:
         })
 
     def get_themes(self, item_id):
-        return self.items("/%s/ThemeMedia" % item_id, params={
+        return self.items(f"/{item_id}/ThemeMedia", params={
             'UserId': "{UserId}",
             'InheritFromParent': True
         })
@@ -473,17 +614,19 @@ class GranularAPIMixin:
         return self._get("Plugins")
 
     def check_companion_installed(self):
+        # HEAD is enough to see whether the plugin endpoint exists; it skips
+        # the body transfer and the JSON decode of the GET.
         try:
-            self._get("/Jellyfin.Plugin.KodiSyncQueue/GetServerDateTime")
+            self._head("/Jellyfin.Plugin.KodiSyncQueue/GetServerDateTime")
             return True
-        except Exception:
+        except HTTPException:
             return False
 
     def get_seasons(self, show_id):
-        return self.shows("/%s/Seasons" % show_id, params={
+        return self.shows(f"/{show_id}/Seasons", params={
             'UserId': "{UserId}",
             'EnableImages': True,
-            'Fields': info()
+            'Fields': _INFO_FIELDS
         })
 
     def get_date_modified(self, date, parent_id, media=None):
@@ -494,7 +637,7 @@ class GranularAPIMixin:
             'IsVirtualUnaired': False,
             'IncludeItemTypes': media or None,
             'MinDateLastSaved': date,
-            'Fields': info()
+            'Fields': _INFO_FIELDS
         })
 
     def get_userdata_date_modified(self, date, parent_id, media=None):
@@ -505,7 +648,7 @@ class GranularAPIMixin:
             'IsVirtualUnaired': False,
             'IncludeItemTypes': media or None,
             'MinDateLastSavedForUser': date,
-            'Fields': info()
+            'Fields': _INFO_FIELDS
         })
 
     def refresh_item(self, item_id, recursive=True, image_refresh='FullRefresh', metadata_refresh='FullRefresh', replace_images=False, replace_metadata=True, preset=None):
@@ -555,19 +698,24 @@ class GranularAPIMixin:
             'ReplaceAllMetadata': replace_metadata
         }
 
-        # If item_id is a list, loop through each item and refresh it
+        # If item_id is a list, refresh the items concurrently. The requests
+        # are independent, so overlapping them means the total wait is
+        # roughly one round trip instead of one per item.
         if isinstance(item_id, list):
-            results = []
-            for i in item_id:
-                result = self.items("/%s/Refresh" % i, "POST", params=params)
-                results.append(result)
-            return results
+            if len(item_id) == 1:
+                return [self.items(f"/{item_id[0]}/Refresh", "POST", params=params)]
+            with ThreadPoolExecutor(max_workers=min(len(item_id), 16)) as executor:
+                futures = [
+                    executor.submit(self.items, f"/{i}/Refresh", "POST", params=params)
+                    for i in item_id
+                ]
+                return [future.result() for future in futures]
         else:
             # If item_id is a single string, just refresh that item
-            return self.items("/%s/Refresh" % item_id, "POST", params=params)
+            return self.items(f"/{item_id}/Refresh", "POST", params=params)
 
     def favorite(self, item_id, option=True):
-        return self.users("/FavoriteItems/%s" % item_id, "POST" if option else "DELETE")
+        return self.users(f"/FavoriteItems/{item_id}", "POST" if option else "DELETE")
 
     def get_system_info(self):
         return self._get("System/Configuration")
@@ -604,15 +752,26 @@ class GranularAPIMixin:
         return self.sessions("/Capabilities/Full", "POST", json=data)
 
     def session_add_user(self, session_id, user_id, option=True):
-        return self.sessions("/%s/Users/%s" % (session_id, user_id), "POST" if option else "DELETE")
+        return self.sessions(f"/{session_id}/Users/{user_id}", "POST" if option else "DELETE")
+
+    def _throttle(self):
+        # Playback reporting fires on a timer per active session; an
+        # optional rate cap keeps many sessions from saturating the server
+        # (and triggering throttling and retry storms).
+        rate = self.config.data.get('http.rate_limit_rps')
+        if rate:
+            self._limiter.acquire(rate)
 
     def session_playing(self, data):
+        self._throttle()
         return self.sessions("/Playing", "POST", json=data)
 
     def session_progress(self, data):
+        self._throttle()
         return self.sessions("/Playing/Progress", "POST", json=data)
 
     def session_stop(self, data):
+        self._throttle()
         return self.sessions("/Playing/Stopped", "POST", json=data)
 
     def remote_pause(self, id):
@@ -621,7 +780,7 @@ class GranularAPIMixin:
     def remote_playpause(self, id):
         return self.remote(id, "PlayPause")
 
-    def remote_seek(self, id, ticks, params={}, json={}):
+    def remote_seek(self, id, ticks, params=None, json=None):
         """
         Seek to a specific position in the specified session.
 
@@ -630,7 +789,7 @@ class GranularAPIMixin:
             ticks (int): The position (in ticks) to seek to
         """
         return self.remote(
-            id, "Seek", params={"seekPositionTicks": ticks, **params}, json=json
+            id, "Seek", params={"seekPositionTicks": ticks, **(params or {})}, json=json
         )
 
     def remote_stop(self, id):
@@ -640,7 +799,7 @@ class GranularAPIMixin:
         return self.remote(id, "Unpause")
 
     def remote_play_media(
-        self, id: str, item_ids: List[str], command: str = "PlayNow", params={}, json={}
+        self, id: str, item_ids: List[str], command: str = "PlayNow", params=None, json=None
     ):
         """Instruct the session to play some media
 
@@ -653,10 +812,10 @@ class GranularAPIMixin:
             id,
             None,
             json=json,
-            params={"playCommand": command, "itemIds": item_ids, **params},
+            params={"playCommand": command, "itemIds": item_ids, **(params or {})},
         )
 
-    def remote_set_volume(self, id: str, volume: int, json={}):
+    def remote_set_volume(self, id: str, volume: int, json=None):
         """
         Set the volume on the sessions.
 
@@ -664,7 +823,7 @@ class GranularAPIMixin:
             id (int): The session id to control
             volume (int): The volume normalized from 0 to 100
         """
-        return self.command(id, "SetVolume", json={"Volume": volume, **json})
+        return self.command(id, "SetVolume", json={"Volume": volume, **(json or {})})
 
     def remote_mute(self, id):
         return self.command(id, "Mute")
@@ -676,7 +835,7 @@ class GranularAPIMixin:
         params = {}
         if watched and date is not None:
             params["datePlayed"] = date
-        return self.users("/PlayedItems/%s" % item_id, "POST" if watched else "DELETE", params=params)
+        return self.users(f"/PlayedItems/{item_id}", "POST" if watched else "DELETE", params=params)
 
     def get_sync_queue(self, date, filters=None):
         return self._get("Jellyfin.Plugin.KodiSyncQueue/{UserId}/GetItems", params={
@@ -705,7 +864,7 @@ class GranularAPIMixin:
         # Should this be a get?
         # https://api.jellyfin.org/#tag/MediaInfo
         # https://api.jellyfin.org/#tag/MediaInfo/operation/GetPostedPlaybackInfo
-        return self.items("/%s/PlaybackInfo" % item_id, "POST", json=args)
+        return self.items(f"/{item_id}/PlaybackInfo", "POST", json=args)
 
     def get_live_stream(self, item_id, play_id, token, profile):
         return self._post("LiveStreams/Open", json={
@@ -727,7 +886,7 @@ class GranularAPIMixin:
         })
 
     def get_audio_stream(self, dest_file, item_id, play_id, container, max_streaming_bitrate=140000000, audio_codec=None):
-        self._get_stream("Audio/%s/universal" % item_id, dest_file, params={
+        self._get_stream(f"Audio/{item_id}/universal", dest_file, params={
             'UserId': "{UserId}",
             'DeviceId': "{DeviceId}",
             'PlaySessionId': play_id,
@@ -737,11 +896,27 @@ class GranularAPIMixin:
         })
 
     def get_default_headers(self):
+        # The HTTP layer caches the built dict keyed on every config value
+        # the headers depend on and hands back a fresh copy, so callers are
+        # free to mutate the result (e.g. login).
         return self.client._get_default_headers(content_type="application/x-www-form-urlencoded; charset=UTF-8")
 
+    def _get_session(self):
+        ''' Reuse one pooled session for requests made outside of an
+            established client session. Falling back to the module-level
+            requests API would open a new connection (and redo any TLS
+            handshake) on every call.
+        '''
+        if self._session is None:
+            self._session = create_session(self.config.data.get('http.max_retries', 3))
+
+        return self._session
+
     def send_request(self, url, path, method="get", timeout=None, headers=None, data=None, session=None):
-        request_method = getattr(session or requests, method.lower())
-        url = "%s/%s" % (url, path)
+        # session.get/post are thin wrappers around Session.request; call it
+        # directly and skip the per-call attribute lookup.
+        session = session or self._get_session()
+        url = f"{url}/{path}"
         request_settings = {
             "timeout": timeout or self.default_timeout,
             "headers": headers or self.get_default_headers(),
@@ -752,11 +927,11 @@ class GranularAPIMixin:
         if self.config.data.get('auth.ssl') is False:
             request_settings["verify"] = False
 
-        LOG.info("Sending %s request to %s" % (method, path))
+        LOG.info("Sending %s request to %s", method, path)
         LOG.debug(request_settings['timeout'])
         LOG.debug(request_settings['headers'])
 
-        return request_method(url, **request_settings)
+        return session.request(method, url, **request_settings)
 
     def login(self, server_url, username, password=""):
         path = "Users/AuthenticateByName"
@@ -769,9 +944,9 @@ class GranularAPIMixin:
         headers.update({'Content-type': "application/json"})
 
         try:
-            LOG.info("Trying to login to %s/%s as %s" % (server_url, path, username))
+            LOG.info("Trying to login to %s/%s as %s", server_url, path, username)
             response = self.send_request(server_url, path, method="post", headers=headers,
-                                         data=json.dumps(authData), timeout=(5, 30))
+                                         data=_json_dumps(authData), timeout=(5, 30))
 
             if response.status_code == 200:
                 return response.json()
@@ -794,17 +969,51 @@ class GranularAPIMixin:
         response = self.send_request(server['address'], "system/info", headers=headers)
         return response.json() if response.status_code == 200 else {}
 
+    # Public server info and redirect targets are stable for the lifetime of
+    # a session; reconnect/authenticate loops re-probe the same address many
+    # times, so successful answers are kept for a few minutes.
+    address_info_ttl = 300
+    address_info_cache_size = 128
+
+    def _cached_address_lookup(self, key, lookup):
+        now = time.monotonic()
+        cached = self._address_info_cache.get(key)
+
+        if cached is not None and now - cached[0] < self.address_info_ttl:
+            return cached[1]
+
+        result = lookup()
+
+        if result:  # never cache failed probes
+            with self._cache_lock:
+                if len(self._address_info_cache) >= self.address_info_cache_size:
+                    self._address_info_cache.pop(next(iter(self._address_info_cache)), None)
+                self._address_info_cache[key] = (now, result)
+
+        return result
+
+    def clear_address_cache(self):
+        ''' Drops cached public-info/redirect probe results, e.g. after
+        credentials are cleared or a server became unreachable.
+        '''
+        self._address_info_cache.clear()
+
     def get_public_info(self, server_address):
-        response = self.send_request(server_address, "system/info/public")
-        return response.json() if response.status_code == 200 else {}
+        def lookup():
+            response = self.send_request(server_address, "system/info/public")
+            return response.json() if response.status_code == 200 else {}
+
+        return self._cached_address_lookup(("info", server_address), lookup)
 
     def check_redirect(self, server_address):
         ''' Checks if the server is redirecting traffic to a new URL and
         returns the URL the server prefers to use
         '''
-        response = self.send_request(server_address, "system/info/public")
-        url = response.url.replace('/system/info/public', '')
-        return url
+        def lookup():
+            response = self.send_request(server_address, "system/info/public")
+            return response.url.replace('/system/info/public', '')
+
+        return self._cached_address_lookup(("redirect", server_address), lookup)
 
 
 class SyncPlayAPIMixin:
@@ -813,8 +1022,16 @@ class SyncPlayAPIMixin:
     """
 
     def _parse_precise_time(self, time):
-        # We have to remove the Z and the least significant digit.
-        return datetime.strptime(time[:-2], "%Y-%m-%dT%H:%M:%S.%f")
+        # The server sends "YYYY-MM-DDTHH:MM:SS.fffffffZ". Slice the fields
+        # directly instead of using datetime.strptime; this feeds the
+        # Syncplay clock-skew measurement, so parse time counts against the
+        # measured round trip. The 7th fractional digit and the Z are
+        # dropped, as before.
+        return datetime(
+            int(time[0:4]), int(time[5:7]), int(time[8:10]),
+            int(time[11:13]), int(time[14:16]), int(time[17:19]),
+            int(time[20:26])
+        )
 
     def utc_time(self):
         # Measure time as close to the call as is possible.
@@ -826,8 +1043,9 @@ class SyncPlayAPIMixin:
         request_sent = response_received - response.elapsed
 
         response_obj = response.json()
-        request_received = self._parse_precise_time(response_obj["RequestReceptionTime"])
-        response_sent = self._parse_precise_time(response_obj["ResponseTransmissionTime"])
+        parse = self._parse_precise_time
+        request_received = parse(response_obj["RequestReceptionTime"])
+        response_sent = parse(response_obj["ResponseTransmissionTime"])
 
         return {
             "request_sent": request_sent,
@@ -861,27 +1079,49 @@ class SyncPlayAPIMixin:
         """10.7.0+ only"""
         return self._post("SyncPlay/Unpause")
 
-    def seek_sync_play(self, position_ticks):
-        return self._post("SyncPlay/Seek", {
-            "PositionTicks": position_ticks
-        })
+    def _sync_play_send(self, kind, state, force, post):
+        # Player loops re-report the same state many times in quick
+        # succession (especially Ready around unpause). Skip the POST when
+        # the state is unchanged and the last send was under a second ago,
+        # replaying the previous response instead.
+        if not force:
+            cached = self._last_sync_play_state.get(kind)
+            if cached is not None and cached[0] == state and time.monotonic() - cached[1] < 1.0:
+                return cached[2]
+        response = post()
+        self._last_sync_play_state[kind] = (state, time.monotonic(), response)
+        return response
+
+    def seek_sync_play(self, position_ticks, force=False):
+        return self._sync_play_send(
+            "seek", (position_ticks,), force,
+            lambda: self._post("SyncPlay/Seek", {
+                "PositionTicks": position_ticks
+            })
+        )
 
-    def buffering_sync_play(self, when, position_ticks, is_playing, item_id):
-        return self._post("SyncPlay/Buffering", {
-            "When": when.isoformat() + "Z",
-            "PositionTicks": position_ticks,
-            "IsPlaying": is_playing,
-            "PlaylistItemId": item_id
-        })
+    def buffering_sync_play(self, when, position_ticks, is_playing, item_id, force=False):
+        return self._sync_play_send(
+            "buffering", (position_ticks, is_playing, item_id), force,
+            lambda: self._post("SyncPlay/Buffering", {
+                "When": _format_utc(when),
+                "PositionTicks": position_ticks,
+                "IsPlaying": is_playing,
+                "PlaylistItemId": item_id
+            })
+        )
 
-    def ready_sync_play(self, when, position_ticks, is_playing, item_id):
+    def ready_sync_play(self, when, position_ticks, is_playing, item_id, force=False):
         """10.7.0+ only"""
-        return self._post("SyncPlay/Ready", {
-            "When": when.isoformat() + "Z",
-            "PositionTicks": position_ticks,
-            "IsPlaying": is_playing,
-            "PlaylistItemId": item_id
-        })
+        return self._sync_play_send(
+            "ready", (position_ticks, is_playing, item_id), force,
+            lambda: self._post("SyncPlay/Ready", {
+                "When": _format_utc(when),
+                "PositionTicks": position_ticks,
+                "IsPlaying": is_playing,
+                "PlaylistItemId": item_id
+            })
+        )
 
     def reset_queue_sync_play(self, queue_item_ids, position=0, position_ticks=0):
         """10.7.0+ only"""
@@ -916,9 +1156,32 @@ class SyncPlayAPIMixin:
         })
 
     def ping_sync_play(self, ping):
-        return self._post("SyncPlay/Ping", {
+        start = time.monotonic()
+        response = self._post("SyncPlay/Ping", {
             "Ping": ping
         })
+        rtt = time.monotonic() - start
+
+        self.last_ping_rtt = rtt
+        if self._ping_rtt_ewma is None:
+            self._ping_rtt_ewma = rtt
+        else:
+            self._ping_rtt_ewma = 0.8 * self._ping_rtt_ewma + 0.2 * rtt
+
+        return response
+
+    @property
+    def suggested_ping_interval(self):
+        """
+        Ping cadence (in seconds) adapted to the observed round-trip time:
+        roughly four round trips, clamped to [0.25, 2.0], so pings never
+        stack up on slow links while fast links may ping more frequently
+        than the usual one-second timer. Callers may use this instead of a
+        fixed cadence.
+        """
+        if self._ping_rtt_ewma is None:
+            return 1.0
+        return min(max(4.0 * self._ping_rtt_ewma, 0.25), 2.0)
 
     def new_sync_play(self):
         """deprecated (< 10.7.0)"""
@@ -955,24 +1218,34 @@ class ExperimentalAPIMixin:
             .. [RemoveProviderSearch] https://api.jellyfin.org/#tag/ItemLookup/operation/ApplySearchCriteria
         """
         body = {'ProviderIds': provider_ids}
-        return client.jellyfin.items('/RemoteSearch/Apply/' + item_id, action='POST', params=None, json=body)
+        return client.jellyfin.items(f"/RemoteSearch/Apply/{item_id}", action='POST', params=None, json=body)
+
+    # UI pollers call get_now_playing many times per second; answers inside
+    # this window are served from memory instead of hitting the server.
+    now_playing_ttl = 0.25
 
     def get_now_playing(self, session_id):
         """
         Simplified API to get now playing information for a session including the
         play state.
 
+        Results are cached for ``now_playing_ttl`` seconds per session, so
+        several pollers in the same window share one request.
+
         References:
             https://github.com/jellyfin/jellyfin/issues/9665
         """
+        cached = self._now_playing_cache.get(session_id)
+        if cached is not None and time.monotonic() - cached[1] < self.now_playing_ttl:
+            return cached[0]
+
+        # The Id param already filters server-side; the scan over the
+        # response is just a guard, so stop at the first match.
         resp = self.sessions(params={
             'Id': session_id,
             'fields': ['PlayState']
         })
-        found = None
-        for item in resp:
-            if item['Id'] == session_id:
-                found = item
+        found = next((item for item in resp if item['Id'] == session_id), None)
         if not found:
             raise KeyError(f'No session_id={session_id}')
         play_state = found['PlayState']
@@ -981,6 +1254,11 @@ class ExperimentalAPIMixin:
             # handle case if nothing is playing
             now_playing = {'Name': None}
         now_playing['PlayState'] = play_state
+
+        with self._cache_lock:
+            if len(self._now_playing_cache) >= 64:
+                self._now_playing_cache.pop(next(iter(self._now_playing_cache)), None)
+            self._now_playing_cache[session_id] = (now_playing, time.monotonic())
         return now_playing
 
 
@@ -1026,7 +1304,27 @@ class CollectionAPIMixin:
             params['ids'] = item_ids
         return self._post("Collections", json, params)
 
-    def add_collection_items(self, collection_id, item_ids):
+    def _edit_collection_items(self, collection_id, item_ids, action, chunk_size):
+        handler = f"Collections/{collection_id}/Items"
+        send = self._post if action == "POST" else self._delete
+
+        if isinstance(item_ids, str):
+            return send(handler, params={'ids': item_ids})
+
+        if len(item_ids) <= chunk_size:
+            return send(handler, params={'ids': ','.join(item_ids)})
+
+        # Oversized edits are split and sent concurrently; the chunks are
+        # independent, so total latency stays near one round trip.
+        chunks = [item_ids[i:i + chunk_size] for i in range(0, len(item_ids), chunk_size)]
+        with ThreadPoolExecutor(max_workers=min(len(chunks), 8)) as executor:
+            futures = [
+                executor.submit(send, handler, params={'ids': ','.join(chunk)})
+                for chunk in chunks
+            ]
+            return [future.result() for future in futures]
+
+    def add_collection_items(self, collection_id, item_ids, chunk_size=500):
         """
         Adds items to a collection.
 
@@ -1037,15 +1335,17 @@ class CollectionAPIMixin:
             item_ids (List[str]):
                 List of item ids to add to the collection.
 
+            chunk_size (int):
+                Lists longer than this are split into chunks posted
+                concurrently, in which case a list of responses is
+                returned.
+
         References:
             .. [AddToCollection] https://api.jellyfin.org/#tag/Collection/operation/AddToCollection
         """
-        params = {}
-        json = {}
-        params['ids'] = ','.join(item_ids)
-        return self._post(f"Collections/{collection_id}/Items", json, params)
+        return self._edit_collection_items(collection_id, item_ids, "POST", chunk_size)
 
-    def remove_collection_items(self, collection_id, item_ids=None):
+    def remove_collection_items(self, collection_id, item_ids=None, chunk_size=500):
         """
         Removes items from a collection.
 
@@ -1056,13 +1356,15 @@ class CollectionAPIMixin:
             item_ids (List[str]):
                 List of item ids to remove from the collection.
 
+            chunk_size (int):
+                Lists longer than this are split into chunks sent
+                concurrently, in which case a list of responses is
+                returned.
+
         References:
             .. [RemoveFromCollection] https://api.jellyfin.org/#tag/Collection/operation/RemoveFromCollection
         """
-        params = {}
-        json = {}
-        params['ids'] = ','.join(item_ids)
-        return self._delete(f"Collections/{collection_id}/Items", json, params)
+        return self._edit_collection_items(collection_id, item_ids, "DELETE", chunk_size)
 
 
 class API(InternalAPIMixin, BiggerAPIMixin, GranularAPIMixin,
@@ -1114,3 +1416,14 @@ class API(InternalAPIMixin, BiggerAPIMixin, GranularAPIMixin,
         self.client = client
         self.config = client.config
         self.default_timeout = 5
+        self._session = None
+        self._limiter = _RateLimiter()
+        self._last_sync_play_state = {}
+        self._now_playing_cache = {}
+        self._address_info_cache = {}
+        # Serializes cache eviction+insert; the bulk helpers issue requests
+        # from worker threads, and an unsynchronized pop of the oldest key
+        # can raise KeyError when two threads race at the size cap.
+        self._cache_lock = threading.Lock()
+        self._ping_rtt_ewma = None
+        self.last_ping_rtt = None
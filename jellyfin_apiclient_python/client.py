@@ -2,13 +2,14 @@
 
 #################################################################################################
 
+import functools
 import logging
 
 from . import api
 from .configuration import Config
 from .http import HTTP
 from .ws_client import WSClient
-from .connection_manager import ConnectionManager, CONNECTION_STATE
+from .connection_manager import ConnectionManager, ConnectionState, CONNECTION_STATE  # noqa: F401
 from .timesync_manager import TimeSyncManager
 
 #################################################################################################
@@ -36,12 +37,26 @@ class JellyfinClient(object):
 
         self.config = Config()
         self.http = HTTP(self)
-        self.wsc = WSClient(self, allow_multiple_clients)
         self.auth = ConnectionManager(self)
-        self.jellyfin = api.API(self.http)
         self.callback_ws = callback
         self.callback = callback
-        self.timesync = TimeSyncManager(self)
+        self._allow_multiple_clients = allow_multiple_clients
+
+    # The websocket client, API facade and time-sync manager are only needed
+    # by a subset of consumers, so they are built on first access instead of
+    # eagerly in __init__.
+
+    @functools.cached_property
+    def wsc(self):
+        return WSClient(self, self._allow_multiple_clients)
+
+    @functools.cached_property
+    def jellyfin(self):
+        return api.API(self.http)
+
+    @functools.cached_property
+    def timesync(self):
+        return TimeSyncManager(self)
 
     def set_credentials(self, credentials=None):
         self.auth.credentials.set_credentials(credentials or {})
@@ -54,7 +69,7 @@ class JellyfinClient(object):
         self.set_credentials(credentials or {})
         state = self.auth.connect(options or {}, discover)
 
-        if state['State'] == CONNECTION_STATE['SignedIn']:
+        if state['State'] == ConnectionState.SignedIn:
 
             LOG.info("User is authenticated.")
             self.logged_in = True
@@ -81,6 +96,9 @@ class JellyfinClient(object):
         self.wsc.start()
 
     def stop(self):
-        self.wsc.stop_client()
+        # Only tear down components that were actually constructed.
+        if 'wsc' in self.__dict__:
+            self.wsc.stop_client()
         self.http.stop_session()
-        self.timesync.stop_ping()
+        if 'timesync' in self.__dict__:
+            self.timesync.stop_ping()
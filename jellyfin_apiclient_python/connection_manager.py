@@ -2,14 +2,25 @@
 
 #################################################################################################
 
+import functools
 import json
 import logging
+import selectors
 import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from enum import IntEnum
 from operator import itemgetter
 
 import urllib3
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 from .credentials import Credentials
 from .api import API
 from .http import HTTP
@@ -18,20 +29,65 @@ import traceback
 #################################################################################################
 
 LOG = logging.getLogger('JELLYFIN.' + __name__)
-CONNECTION_STATE = {
-    'Unavailable': 0,
-    'ServerSelection': 1,
-    'ServerSignIn': 2,
-    'SignedIn': 3
-}
+
+
+class ConnectionState(IntEnum):
+    Unavailable = 0
+    ServerSelection = 1
+    ServerSignIn = 2
+    SignedIn = 3
+
+
+# Backward-compatible alias; members compare equal to the old int values.
+CONNECTION_STATE = {state.name: state for state in ConnectionState}
 
 #################################################################################################
 
+
+@functools.lru_cache(maxsize=256)
+def _normalize_address(address):
+    # TODO: Try HTTPS first, then HTTP if that fails.
+    # Normalization is pure string work and the same addresses recur across
+    # reconnects, so the parse_url regex cost is paid once per address.
+    if '://' not in address:
+        address = 'http://' + address
+
+    # Attempt to correct bad input
+    url = urllib3.util.parse_url(address.strip())
+
+    if url.scheme is None:
+        url = url._replace(scheme='http')
+
+    if url.scheme == 'http' and url.port == 80:
+        url = url._replace(port=None)
+
+    if url.scheme == 'https' and url.port == 443:
+        url = url._replace(port=None)
+
+    return url.url
+
+
+def _date_stamp():
+    # Same shape as strftime('%Y-%m-%dT%H:%M:%SZ') without re-parsing the
+    # format string on every login/connect.
+    now = datetime.now()
+    return (f"{now.year:04d}-{now.month:02d}-{now.day:02d}"
+            f"T{now.hour:02d}:{now.minute:02d}:{now.second:02d}Z")
+
+
 class ConnectionManager(object):
 
     user = {}
     server_id = None
 
+    # How long a successfully validated (or freshly issued) access token is
+    # trusted before _after_connect_validated re-checks it with the server.
+    token_validation_ttl = 300
+
+    # A server accessed within this window counts as "recent", letting
+    # get_available_servers skip the blocking UDP discovery broadcast.
+    recent_server_ttl = 86400
+
     def __init__(self, client):
 
         LOG.debug("ConnectionManager initializing...")
@@ -40,12 +96,15 @@ class ConnectionManager(object):
         self.config = client.config
         self.credentials = Credentials()
         self.API = API(HTTP(client))
+        self._token_validated_at = {}
 
     def clear_data(self):
 
         LOG.info("connection manager clearing data")
 
         self.user = None
+        self.API.clear_address_cache()
+        self._token_validated_at.clear()
         credentials = self.credentials.get_credentials()
         credentials['Servers'] = list()
         self.credentials.set_credentials(credentials)
@@ -56,6 +115,7 @@ class ConnectionManager(object):
 
         LOG.info("revoking token")
 
+        self._token_validated_at.clear()
         credentials = self.credentials.get_credentials()
         for server in credentials["Servers"]:
             server["AccessToken"] = None
@@ -63,7 +123,7 @@ class ConnectionManager(object):
 
         self.config.data['auth.token'] = None
 
-    def get_available_servers(self, discover=True):
+    def get_available_servers(self, discover=True, discover_if_stale=True):
 
         LOG.info("Begin getAvailableServers")
 
@@ -71,6 +131,13 @@ class ConnectionManager(object):
         credentials = self.credentials.get()
         found_servers = []
 
+        # The discovery broadcast blocks for a second; returning users with a
+        # recently accessed server skip it. Pass discover_if_stale=False to
+        # force the broadcast regardless.
+        if discover and discover_if_stale and self._has_recent_server(credentials['Servers']):
+            LOG.info("Skipping server discovery, recently used server is known")
+            discover = False
+
         if discover:
             found_servers = self.process_found_servers(self._server_discovery())
 
@@ -94,6 +161,23 @@ class ConnectionManager(object):
 
         return servers
 
+    def _has_recent_server(self, servers):
+
+        for server in servers:
+            date = server.get('DateLastAccessed')
+            if not date:
+                continue
+
+            try:
+                last = datetime(*(time.strptime(date, '%Y-%m-%dT%H:%M:%SZ')[0:6]))
+            except ValueError:
+                continue
+
+            if (datetime.now() - last).total_seconds() < self.recent_server_ttl:
+                return True
+
+        return False
+
     def login(self, server_url, username, password=None, clear=None, options=None):
 
         if not username:
@@ -121,14 +205,11 @@ class ConnectionManager(object):
         self.config.data['auth.user_id'] = data['User']['Id']
         self.config.data['auth.token'] = data['AccessToken']
 
-        for server in credentials['Servers']:
-            if server['Id'] == data['ServerId']:
-                found_server = server
-                break
-        else:
+        found_server = self.credentials.get_server(data['ServerId'])
+        if found_server is None:
             return {} # No server found
 
-        found_server['DateLastAccessed'] = datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ')
+        found_server['DateLastAccessed'] = _date_stamp()
         found_server['UserId'] = data['User']['Id']
         found_server['AccessToken'] = data['AccessToken']
 
@@ -138,9 +219,10 @@ class ConnectionManager(object):
             'Id': data['User']['Id'],
             'IsSignedInOffline': True
         }
-        self.credentials.add_update_user(server, info)
+        self.credentials.add_update_user(found_server, info)
 
         self.credentials.set_credentials(credentials)
+        self._token_validated_at[data['ServerId']] = time.monotonic()
 
         return data
 
@@ -163,24 +245,27 @@ class ConnectionManager(object):
             server = self.connect_to_server(server, options)
             if server is False:
                 LOG.error("connect_to_address %s failed", address)
-                return { 'State': CONNECTION_STATE['Unavailable'] }
+                return { 'State': ConnectionState.Unavailable }
 
             return server
         except Exception:
             LOG.error("connect_to_address %s failed", address)
-            return { 'State': CONNECTION_STATE['Unavailable'] }
+            return { 'State': ConnectionState.Unavailable }
 
 
-    def connect_to_server(self, server, options={}):
+    def connect_to_server(self, server, options={}, public_info=None):
 
         LOG.info("begin connect_to_server")
 
+        address = server.get('address')
+
         try:
-            result = self.API.get_public_info(server.get('address'))
+            result = public_info or self.API.get_public_info(address)
 
             if not result:
-                LOG.error("Failed to connect to server: %s" % server.get('address'))
-                return { 'State': CONNECTION_STATE['Unavailable'] }
+                LOG.error("Failed to connect to server: %s" % address)
+                self.API.clear_address_cache()
+                return { 'State': ConnectionState.Unavailable }
 
             LOG.info("calling onSuccessfulConnection with server %s", server.get('Name'))
 
@@ -191,7 +276,7 @@ class ConnectionManager(object):
         except Exception as e:
             LOG.error(traceback.format_exc())
             LOG.error("Failing server connection. ERROR msg: {}".format(e))
-            return { 'State': CONNECTION_STATE['Unavailable'] }
+            return { 'State': ConnectionState.Unavailable }
 
     def connect(self, options={}, discover=True):
 
@@ -205,11 +290,35 @@ class ConnectionManager(object):
                 'State': ['ServerSelection']
             }
 
-        result = self.connect_to_server(servers[0], options)
+        if len(servers) == 1:
+            result = self.connect_to_server(servers[0], options)
+        else:
+            # Probe the candidates concurrently so the wall-clock cost is the
+            # slowest probe rather than their sum, then connect to the first
+            # responsive server in preference order.
+            candidates = servers[:8]
+
+            with ThreadPoolExecutor(max_workers=len(candidates)) as executor:
+                infos = list(executor.map(self._probe_server, candidates))
+
+            for server, info in zip(candidates, infos):
+                if info:
+                    result = self.connect_to_server(server, options, public_info=info)
+                    break
+            else:
+                result = { 'State': ConnectionState.Unavailable }
+
         LOG.debug("resolving connect with result: %s", result)
 
         return result
 
+    def _probe_server(self, server):
+        try:
+            return self.API.get_public_info(server.get('address'))
+        except Exception:
+            LOG.error("Failed to probe server: %s", server.get('address'))
+            return {}
+
     def jellyfin_user_id(self):
         return self.get_server_info(self.server_id)['UserId']
 
@@ -222,11 +331,7 @@ class ConnectionManager(object):
             LOG.info("server_id is empty")
             return {}
 
-        servers = self.credentials.get()['Servers']
-
-        for server in servers:
-            if server['Id'] == server_id:
-                return server
+        return self.credentials.get_server(server_id)
 
     def get_public_users(self):
         return self.client.jellyfin.get_public_users()
@@ -239,7 +344,7 @@ class ConnectionManager(object):
         MESSAGE = b"who is JellyfinServer?"
 
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        sock.settimeout(1.0)  # This controls the socket.timeout exception
+        sock.setblocking(False)
 
         sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 20)
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
@@ -252,43 +357,50 @@ class ConnectionManager(object):
         servers = []
 
         try:
-            sock.sendto(MESSAGE, MULTI_GROUP)
-        except Exception as error:
-            LOG.exception(traceback.format_exc())
-            LOG.exception(error)
-            return servers
-
-        while True:
             try:
-                data, addr = sock.recvfrom(1024)  # buffer size
-                servers.append(json.loads(data))
-
-            except socket.timeout:
-                LOG.info("Found Servers: %s", servers)
-                return servers
-
-            except Exception as e:
-                LOG.error(traceback.format_exc())
-                LOG.exception("Error trying to find servers: %s", e)
+                sock.sendto(MESSAGE, MULTI_GROUP)
+            except Exception as error:
+                LOG.exception(traceback.format_exc())
+                LOG.exception(error)
                 return servers
 
-    def process_found_servers(self, found_servers):
-
-        servers = []
-
-        for found_server in found_servers:
+            # Drain responses against a fixed wall-clock deadline instead of
+            # waiting out a full blocking-recv timeout after the last packet.
+            selector = selectors.DefaultSelector()
+            selector.register(sock, selectors.EVENT_READ)
 
-            server = self._convert_endpoint_address_to_manual_address(found_server)
+            try:
+                deadline = time.monotonic() + 1.0
+
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not selector.select(timeout=remaining):
+                        LOG.info("Found Servers: %s", servers)
+                        return servers
+
+                    try:
+                        while True:
+                            data, addr = sock.recvfrom(1024)  # buffer size
+                            servers.append(_json_loads(data))
+                    except BlockingIOError:
+                        continue
+
+                    except Exception as e:
+                        LOG.error(traceback.format_exc())
+                        LOG.exception("Error trying to find servers: %s", e)
+                        return servers
+            finally:
+                selector.close()
+        finally:
+            sock.close()
 
-            info = {
-                'Id': found_server['Id'],
-                'address': server or found_server['Address'],
-                'Name': found_server['Name']
-            }
+    def process_found_servers(self, found_servers):
 
-            servers.append(info)
-        else:
-            return servers
+        return [{
+            'Id': found_server['Id'],
+            'address': self._convert_endpoint_address_to_manual_address(found_server) or found_server['Address'],
+            'Name': found_server['Name']
+        } for found_server in found_servers]
 
     # TODO: Make IPv6 compatable
     def _convert_endpoint_address_to_manual_address(self, info):
@@ -310,23 +422,7 @@ class ConnectionManager(object):
         return None
 
     def _normalize_address(self, address):
-        # TODO: Try HTTPS first, then HTTP if that fails.
-        if '://' not in address:
-            address = 'http://' + address
-
-        # Attempt to correct bad input
-        url = urllib3.util.parse_url(address.strip())
-
-        if url.scheme is None:
-            url = url._replace(scheme='http')
-
-        if url.scheme == 'http' and url.port == 80:
-            url = url._replace(port=None)
-
-        if url.scheme == 'https' and url.port == 443:
-            url = url._replace(port=None)
-
-        return url.url
+        return _normalize_address(address)
 
     def _after_connect_validated(self, server, credentials, system_info, verify_authentication, options):
         if options.get('enableAutoLogin') is False:
@@ -335,10 +431,21 @@ class ConnectionManager(object):
             self.config.data['auth.token'] = server.pop('AccessToken', None)
 
         elif verify_authentication and server.get('AccessToken'):
+            validated_at = self._token_validated_at.get(server.get('Id'))
+            if validated_at is not None and time.monotonic() - validated_at < self.token_validation_ttl:
+                # Token was checked (or issued by login) moments ago; skip
+                # the redundant round-trip.
+                if "UserId" in server:
+                    self.config.data['auth.user_id'] = server['UserId']
+                self.config.data['auth.token'] = server['AccessToken']
+
+                return self._after_connect_validated(server, credentials, system_info, False, options)
+
             system_info = self.API.validate_authentication_token(server)
             if system_info:
 
                 self._update_server_info(server, system_info)
+                self._token_validated_at[server['Id']] = time.monotonic()
                 if "UserId" in server:
                     self.config.data['auth.user_id'] = server['UserId']
                 self.config.data['auth.token'] = server['AccessToken']
@@ -347,26 +454,31 @@ class ConnectionManager(object):
 
             server['UserId'] = None
             server['AccessToken'] = None
-            return { 'State': CONNECTION_STATE['Unavailable'] }
+            return { 'State': ConnectionState.Unavailable }
 
         self._update_server_info(server, system_info)
 
-        server['DateLastAccessed'] = datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ')
+        server['DateLastAccessed'] = _date_stamp()
         self.credentials.add_update_server(credentials['Servers'], server)
         self.credentials.set(credentials)
         self.server_id = server['Id']
 
-        # Update configs
-        self.config.data['auth.server'] = server['address']
-        self.config.data['auth.server-name'] = server['Name']
-        self.config.data['auth.server=id'] = server['Id']
-        self.config.data['auth.ssl'] = options.get('ssl', self.config.data['auth.ssl'])
+        # Update configs in one batch. 'auth.server=id' was a typo for
+        # 'auth.server-id' (the key the HTTP layer reports in callbacks);
+        # keep writing both for anything that read the old key.
+        self.config.data.update({
+            'auth.server': server['address'],
+            'auth.server-name': server['Name'],
+            'auth.server-id': server['Id'],
+            'auth.server=id': server['Id'],
+            'auth.ssl': options.get('ssl', self.config.data['auth.ssl'])
+        })
 
         result = {
             'Servers': [server]
         }
 
-        result['State'] = CONNECTION_STATE['SignedIn'] if server.get('AccessToken') else CONNECTION_STATE['ServerSignIn']
+        result['State'] = ConnectionState.SignedIn if server.get('AccessToken') else ConnectionState.ServerSignIn
         # Connected
         return result
 
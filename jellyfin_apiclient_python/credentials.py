@@ -20,6 +20,8 @@ class Credentials(object):
     def __init__(self):
         LOG.debug("Credentials initializing...")
         self.credentials = {}
+        self._by_id = {}
+        self._indexed_servers = None
 
     def set_credentials(self, credentials):
         self.credentials = credentials
@@ -47,6 +49,20 @@ class Credentials(object):
 
         return self.credentials
 
+    def get_server(self, server_id):
+
+        ''' Look up a known server by Id without scanning the list. The
+            index is rebuilt whenever the list is replaced or grows; merges
+            mutate the indexed dicts in place so they stay valid.
+        '''
+        servers = self.get()['Servers']
+
+        if self._indexed_servers is not servers or len(servers) != len(self._by_id):
+            self._by_id = {server['Id']: server for server in servers if 'Id' in server}
+            self._indexed_servers = servers
+
+        return self._by_id.get(server_id)
+
     def set(self, data):
 
         if data:
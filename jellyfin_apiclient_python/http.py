@@ -4,40 +4,108 @@
 
 import json
 import logging
-import time
+import shutil
+import threading
 import urllib
 
 import requests
+import urllib3
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .configuration import DEFAULT_HTTP_MAX_RETRIES
 from .exceptions import HTTPException
 
 #################################################################################################
 
 LOG = logging.getLogger('Jellyfin.' + __name__)
 
+# Sizing for the per-host connection pool. The requests default of 10
+# serializes bursts of concurrent calls (e.g. bulk refreshes) beyond 10 and
+# discards the extra connections instead of keeping them alive.
+POOL_CONNECTIONS = 32
+POOL_MAXSIZE = 64
+
 #################################################################################################
 
 
+def create_session(max_retries=DEFAULT_HTTP_MAX_RETRIES):
+    ''' Build a requests.Session with retry adapters and an enlarged
+        keep-alive pool mounted for both schemes. Transient failures
+        (connect/read errors and 502s) are retried inside urllib3 with
+        exponential backoff instead of a Python-level sleep loop.
+    '''
+    session = requests.Session()
+
+    retries = urllib3.util.Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        status_forcelist=(502,),
+        backoff_factor=0.3,
+        allowed_methods=frozenset(("GET", "HEAD", "POST", "DELETE")),
+        respect_retry_after_header=True,
+        # Hand the final 502 back as a response instead of raising
+        # MaxRetryError, so it flows through raise_for_status() and keeps
+        # the HTTPException contract of HTTP.request.
+        raise_on_status=False)
+
+    for prefix in ("http://", "https://"):
+        session.mount(prefix, requests.adapters.HTTPAdapter(
+            max_retries=retries,
+            pool_connections=POOL_CONNECTIONS,
+            pool_maxsize=POOL_MAXSIZE))
+
+    return session
+
+
 class HTTP(object):
 
     session = None
-    keep_alive = False
+    keep_alive = True
+    etag_cache_size = 512
 
     def __init__(self, client):
 
         self.client = client
         self.config = client.config
+        self._etag_cache = {}
+        # Serializes eviction+insert; bulk helpers drive this instance from
+        # worker threads and a racing pop of the oldest key raises KeyError.
+        self._etag_lock = threading.Lock()
+        self._fallback_session = None
+        self._headers_key = None
+        self._headers = None
 
     def start_session(self):
 
-        self.session = requests.Session()
+        self.session = create_session(self.config.data['http.max_retries'])
 
-        max_retries = self.config.data['http.max_retries']
-        self.session.mount("http://", requests.adapters.HTTPAdapter(max_retries=max_retries))
-        self.session.mount("https://", requests.adapters.HTTPAdapter(max_retries=max_retries))
+    def get_fallback_session(self):
+
+        ''' Pooled session used for requests made before start_session()
+            (or after stop_session()), so those still reuse connections
+            instead of opening one per call through the module-level
+            requests API.
+        '''
+        if self._fallback_session is None:
+            self._fallback_session = create_session(self.config.data['http.max_retries'])
+
+        return self._fallback_session
 
     def stop_session(self):
 
+        if self._fallback_session is not None:
+            try:
+                self._fallback_session.close()
+            except Exception as error:
+                LOG.warning("The fallback session could not be terminated: %s", error)
+            self._fallback_session = None
+
         if self.session is None:
             return
 
@@ -49,6 +117,11 @@ class HTTP(object):
 
     def _replace_user_info(self, string):
 
+        # Every URL and string param passes through here; most contain no
+        # placeholder at all, so bail out after a single scan.
+        if '{' not in string:
+            return string
+
         if '{server}' in string:
             if self.config.data.get('auth.server', None):
                 string = string.replace("{server}", self.config.data['auth.server'])
@@ -80,7 +153,7 @@ class HTTP(object):
             params["api_key"] = self.config.data.get('auth.token')
 
         encoded_params = urllib.parse.urlencode(data["params"])
-        return "%s?%s" % (data["url"], encoded_params)
+        return f"{data['url']}?{encoded_params}"
 
     def request(self, data, session=None, dest_file=None):
 
@@ -98,108 +171,128 @@ class HTTP(object):
             raise AttributeError("Request cannot be empty")
 
         data = self._request(data)
-        LOG.debug("--->[ http ] %s", json.dumps(data, indent=4))
-        retry = data.pop('retry', 5)
+        if LOG.isEnabledFor(logging.DEBUG):
+            LOG.debug("--->[ http ] %s", json.dumps(data, indent=4, default=str))
+        data.pop('retry', None)  # retained for callers; retries live in the adapter
+        action = data.pop('type', "GET")
         stream = dest_file is not None
 
-        while True:
-
-            try:
-                r = self._requests(session or self.session or requests, data.pop('type', "GET"), **data, stream=stream)
-                if stream:
-                    for chunk in r.iter_content(chunk_size=8192): 
-                        if chunk: # filter out keep-alive new chunks
-                            dest_file.write(chunk)
-                else:
-                    r.content  # release the connection
-
-                if not self.keep_alive and self.session is not None:
-                    self.stop_session()
+        # Serialize the body with orjson when available; requests would
+        # otherwise run stdlib json.dumps plus a UTF-8 encode per call.
+        # The default headers already declare application/json.
+        if orjson is not None and data.get('json') is not None:
+            data['data'] = orjson.dumps(data.pop('json'))
 
-                r.raise_for_status()
+        # Revalidate idempotent GETs with If-None-Match; a 304 skips the
+        # body transfer and the JSON decode and we answer from the cache.
+        cache_key = cached = None
+        if action == "GET" and not stream:
+            cache_key = f"{data['url']}?{json.dumps(data.get('params'), sort_keys=True, default=str)}"
+            cached = self._etag_cache.get(cache_key)
 
-            except requests.exceptions.ConnectionError as error:
-                if retry:
+            if cached is not None:
+                data['headers']['If-None-Match'] = cached[0]
 
-                    retry -= 1
-                    time.sleep(1)
+        # Transient failures are retried with exponential backoff inside the
+        # adapter (see create_session); only terminal errors surface here.
+        try:
+            r = self._requests(session or self.session or self.get_fallback_session(), action, **data, stream=stream)
+            if stream:
+                # Copy straight from the socket buffer to the file in
+                # 1 MiB blocks instead of iterating 8 KiB chunks in
+                # Python. decode_content keeps transparent gzip working.
+                r.raw.decode_content = True
+                shutil.copyfileobj(r.raw, dest_file, length=1 << 20)
+            else:
+                r.content  # release the connection
 
-                    continue
+            r.raise_for_status()
 
-                LOG.error(error)
-                self.client.callback("ServerUnreachable", {'ServerId': self.config.data['auth.server-id']})
+        except requests.exceptions.ConnectionError as error:
+            LOG.error(error)
+            self.client.callback("ServerUnreachable", {'ServerId': self.config.data['auth.server-id']})
 
-                raise HTTPException("ServerUnreachable", error)
+            raise HTTPException("ServerUnreachable", error)
 
-            except requests.exceptions.ReadTimeout as error:
-                if retry:
+        except requests.exceptions.ReadTimeout as error:
+            LOG.error(error)
 
-                    retry -= 1
-                    time.sleep(1)
+            raise HTTPException("ReadTimeout", error)
 
-                    continue
+        except requests.exceptions.HTTPError as error:
+            LOG.error(error)
 
-                LOG.error(error)
+            if r.status_code == 401:
 
-                raise HTTPException("ReadTimeout", error)
+                if 'X-Application-Error-Code' in r.headers:
+                    self.client.callback("AccessRestricted", {'ServerId': self.config.data['auth.server-id']})
 
-            except requests.exceptions.HTTPError as error:
-                LOG.error(error)
+                    raise HTTPException("AccessRestricted", error)
+                else:
+                    self.client.callback("Unauthorized", {'ServerId': self.config.data['auth.server-id']})
+                    self.client.auth.revoke_token()
 
-                if r.status_code == 401:
+                    raise HTTPException("Unauthorized", error)
 
-                    if 'X-Application-Error-Code' in r.headers:
-                        self.client.callback("AccessRestricted", {'ServerId': self.config.data['auth.server-id']})
+            elif r.status_code == 500:  # log and ignore.
+                LOG.error("--[ 500 response ] %s", error)
 
-                        raise HTTPException("AccessRestricted", error)
-                    else:
-                        self.client.callback("Unauthorized", {'ServerId': self.config.data['auth.server-id']})
-                        self.client.auth.revoke_token()
+                return
 
-                        raise HTTPException("Unauthorized", error)
+            raise HTTPException(r.status_code, error)
 
-                elif r.status_code == 500:  # log and ignore.
-                    LOG.error("--[ 500 response ] %s", error)
+        except requests.exceptions.MissingSchema as error:
+            LOG.error("Request missing Schema. " + str(error))
+            raise HTTPException("MissingSchema", {'Id': self.config.data.get('auth.server', "None")})
 
+        else:
+            try:
+                if stream:
                     return
+                self.config.data['server-time'] = r.headers['Date']
+                elapsed = int(r.elapsed.total_seconds() * 1000)
 
-                elif r.status_code == 502:
-                    if retry:
-
-                        retry -= 1
-                        time.sleep(1)
+                if cached is not None and r.status_code == 304:
+                    LOG.debug("---<[ http ][%s ms] etag cache hit", elapsed)
 
-                        continue
+                    # The cache holds raw bytes so every hit decodes into a
+                    # fresh object; callers are free to mutate what they get.
+                    if orjson is not None:
+                        return orjson.loads(cached[1])
+                    return json.loads(cached[1])
 
-                raise HTTPException(r.status_code, error)
-
-            except requests.exceptions.MissingSchema as error:
-                LOG.error("Request missing Schema. " + str(error))
-                raise HTTPException("MissingSchema", {'Id': self.config.data.get('auth.server', "None")})
+                if orjson is not None:
+                    response = orjson.loads(r.content)
+                else:
+                    response = r.json()
 
-            except Exception:
-                raise
+                etag = r.headers.get('ETag')
+                if cache_key is not None and etag:
+                    with self._etag_lock:
+                        if len(self._etag_cache) >= self.etag_cache_size:
+                            self._etag_cache.pop(next(iter(self._etag_cache)), None)
+                        self._etag_cache[cache_key] = (etag, r.content)
 
-            else:
-                try:
-                    if stream:
-                        return
-                    self.config.data['server-time'] = r.headers['Date']
-                    elapsed = int(r.elapsed.total_seconds() * 1000)
-                    response = r.json()
-                    LOG.debug("---<[ http ][%s ms]", elapsed)
+                LOG.debug("---<[ http ][%s ms]", elapsed)
+                if LOG.isEnabledFor(logging.DEBUG):
                     LOG.debug(json.dumps(response, indent=4))
 
-                    return response
-                except ValueError:
-                    return
+                return response
+            except ValueError:
+                return
 
     def _request(self, data):
 
         if 'url' not in data:
-            data['url'] = "%s/%s" % (self.config.data.get("auth.server", ""), data.pop('handler', ""))
+            data['url'] = f"{self.config.data.get('auth.server', '')}/{data.pop('handler', '')}"
 
         data['headers'] = self._get_default_headers()
+
+        # Tiny responses (SyncPlay ticks, progress reports) cost more CPU in
+        # gzip negotiation than the handful of bytes they would save.
+        if data.pop('compress', True) is False:
+            data['headers']['Accept-encoding'] = "identity"
+
         data['timeout'] = data.get('timeout') or self.config.data['http.timeout']
         data['verify'] = data.get('verify') or self.config.data.get('auth.ssl', False)
         data['url'] = self._replace_user_info(data['url'])
@@ -220,38 +313,61 @@ class HTTP(object):
                 params[key] = self._replace_user_info(value)
 
     def _get_authenication_header(self):
+        data = self.config.data
         params = {}
-        if "app.device_name" in self.config.data:
+        if "app.device_name" in data:
             params.update({
-                "Client": self.config.data['app.name'],
-                "Device": self.config.data['app.device_name'],
-                "DeviceId": self.config.data['app.device_id'],
-                "Version": self.config.data['app.version']
+                "Client": data['app.name'],
+                "Device": data['app.device_name'],
+                "DeviceId": data['app.device_id'],
+                "Version": data['app.version']
                 })
-        if "auth.token" in self.config.data:
-            params["Token"] = self.config.data['auth.token']
+        if "auth.token" in data:
+            params["Token"] = data['auth.token']
         param_line = ", ".join(f'{k}="{v}"' for k, v in params.items())
         return f"MediaBrowser {param_line}"
 
     def _get_default_headers(self, content_type="application/json"):
-        app_name = f"{self.config.data.get('app.name', 'Jellyfin for Kodi')}/{self.config.data.get('app.version', '0.0.0')}"
+        # These headers only change when the app/auth config does, yet this
+        # runs once per request. Rebuild only when one of the inputs moves
+        # and hand back a copy, since request() mutates the dict.
+        data = self.config.data
+        key = (content_type,
+               data.get('app.name'),
+               data.get('app.version'),
+               data.get('app.device_name'),
+               data.get('app.device_id'),
+               data.get('http.user_agent'),
+               data.get('auth.token'))
+
+        if key == self._headers_key:
+            return self._headers.copy()
+
+        headers = self._build_default_headers(content_type)
+        self._headers_key = key
+        self._headers = headers
+
+        return headers.copy()
+
+    def _build_default_headers(self, content_type):
+        data = self.config.data
+        app_name = f"{data.get('app.name', 'Jellyfin for Kodi')}/{data.get('app.version', '0.0.0')}"
         return {
             "Accept": "application/json",
             "Content-type": content_type,
             "X-Application": app_name,
             "Accept-Charset": "UTF-8,*",
             "Accept-encoding": "gzip",
-            "User-Agent": self.config.data['http.user_agent'] or app_name,
+            "User-Agent": data['http.user_agent'] or app_name,
             "Authorization": self._get_authenication_header()
         }
 
     def _requests(self, session, action, **kwargs):
 
-        if action == "GET":
-            return session.get(**kwargs)
-        elif action == "POST":
-            return session.post(**kwargs)
-        elif action == "HEAD":
-            return session.head(**kwargs)
-        elif action == "DELETE":
-            return session.delete(**kwargs)
+        # session.get/post/... are thin wrappers around Session.request;
+        # dispatch through it directly instead of branching per verb.
+        # Session.head() disables redirects by default, so mirror that here.
+        if action == "HEAD":
+            kwargs.setdefault('allow_redirects', False)
+
+        return session.request(action, **kwargs)
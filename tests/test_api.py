@@ -0,0 +1,35 @@
+import unittest
+
+from jellyfin_apiclient_python.client import JellyfinClient
+
+
+class TestGetItemsBatched(unittest.TestCase):
+    def setUp(self):
+        self.api = JellyfinClient().jellyfin
+        self.calls = []
+
+        def fake_get_items(item_ids):
+            self.calls.append(list(item_ids))
+            return {'Items': [{'Id': item_id} for item_id in item_ids]}
+
+        self.api.get_items = fake_get_items
+
+    def test_single_chunk_delegates_directly(self):
+        result = self.api.get_items_batched(['a', 'b'], chunk_size=50)
+        self.assertEqual(self.calls, [['a', 'b']])
+        self.assertEqual(result, {'Items': [{'Id': 'a'}, {'Id': 'b'}]})
+
+    def test_chunks_respect_chunk_size(self):
+        ids = [str(i) for i in range(5)]
+        self.api.get_items_batched(ids, chunk_size=2)
+        self.assertEqual(sorted(self.calls), [['0', '1'], ['2', '3'], ['4']])
+
+    def test_merged_items_preserve_order(self):
+        ids = [str(i) for i in range(5)]
+        result = self.api.get_items_batched(ids, chunk_size=2)
+        self.assertEqual([item['Id'] for item in result['Items']], ids)
+        self.assertEqual(result['TotalRecordCount'], 5)
+
+    def test_empty_input(self):
+        result = self.api.get_items_batched([], chunk_size=2)
+        self.assertEqual(result, {'Items': []})
@@ -82,3 +82,36 @@ class TestCredientials(unittest.TestCase):
         new_server = self.credentials.add_update_server(servers, server)
         merged_server = {"Id": 42, "DateLastAccessed": "2001-01-01T00:00:00Z"}
         self.assertEqual(new_server, merged_server)
+
+    def test_get_server(self):
+        server = {"Id": 42}
+        self.credentials.set({"Servers": [server]})
+        self.assertIs(self.credentials.get_server(42), server)
+
+    def test_get_server_missing(self):
+        self.credentials.set({"Servers": [{"Id": 42}]})
+        self.assertIsNone(self.credentials.get_server(7))
+
+    def test_get_server_after_list_replaced(self):
+        self.credentials.set({"Servers": [{"Id": 42}]})
+        self.assertIsNotNone(self.credentials.get_server(42))
+        # Replacing the list wholesale must invalidate the index.
+        replacement = {"Id": 7}
+        self.credentials.set_credentials({"Servers": [replacement]})
+        self.assertIsNone(self.credentials.get_server(42))
+        self.assertIs(self.credentials.get_server(7), replacement)
+
+    def test_get_server_after_list_grows(self):
+        servers = self.credentials.get()["Servers"]
+        self.credentials.add_update_server(servers, {"Id": 42})
+        self.assertIsNotNone(self.credentials.get_server(42))
+        self.credentials.add_update_server(servers, {"Id": 7})
+        self.assertIsNotNone(self.credentials.get_server(7))
+
+    def test_get_server_sees_in_place_edits(self):
+        server = {"Id": 42, "AccessToken": "old"}
+        self.credentials.set({"Servers": [server]})
+        self.credentials.get_server(42)
+        # Merges mutate the indexed dicts in place; the index stays valid.
+        server["AccessToken"] = "new"
+        self.assertEqual(self.credentials.get_server(42)["AccessToken"], "new")
@@ -0,0 +1,72 @@
+import datetime
+import json
+import unittest
+
+from jellyfin_apiclient_python.client import JellyfinClient
+
+
+class FakeResponse(object):
+    def __init__(self, status_code, body=None, etag=None):
+        self.status_code = status_code
+        self.content = json.dumps(body).encode() if body is not None else b""
+        self.headers = {'Date': "Mon, 01 Jan 2024 00:00:00 GMT"}
+        self.elapsed = datetime.timedelta(milliseconds=5)
+        if etag is not None:
+            self.headers['ETag'] = etag
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeSession(object):
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def request(self, method, **kwargs):
+        self.requests.append((method, kwargs))
+        return self.responses.pop(0)
+
+
+class TestEtagReplay(unittest.TestCase):
+    def setUp(self):
+        self.http = JellyfinClient().http
+        self.http.config.data['auth.server'] = "http://example"
+
+    def request(self, session):
+        return self.http.request({'type': "GET", 'handler': "Items"}, session=session)
+
+    def test_304_replays_cached_body(self):
+        body = {'Items': [{'Id': 'a'}]}
+        session = FakeSession([
+            FakeResponse(200, body, etag='"v1"'),
+            FakeResponse(304),
+        ])
+
+        self.assertEqual(self.request(session), body)
+        self.assertEqual(self.request(session), body)
+
+        # The revalidation carried the stored ETag.
+        self.assertNotIn('If-None-Match', session.requests[0][1]['headers'])
+        self.assertEqual(session.requests[1][1]['headers']['If-None-Match'], '"v1"')
+
+    def test_cache_hits_return_fresh_objects(self):
+        body = {'Items': [{'Id': 'a'}]}
+        session = FakeSession([
+            FakeResponse(200, body, etag='"v1"'),
+            FakeResponse(304),
+            FakeResponse(304),
+        ])
+
+        first = self.request(session)
+        first['Items'].append({'Id': 'mutated'})
+        second = self.request(session)
+        self.assertEqual(second, body)
+        self.assertIsNot(second, first)
+
+        # A hit must not hand out the cached object itself either.
+        second['mutated'] = True
+        self.assertEqual(self.request(session), body)